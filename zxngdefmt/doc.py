@@ -6,13 +6,14 @@
 
 import os
 import re
+import sys
 
 from .node import GuideNode, LINE_MAXLEN
 
 from .token import (
-    IGNORE_RE,
-    NODE_LINK_CMDS_RE,
-    NODE_CMDS_RE,
+    IGNORE_RESTR,
+    NODE_LINK_CMDS_RESTR,
+    NODE_CMDS_RESTR,
 )
 
 
@@ -51,8 +52,27 @@ DOC_CMDS = [
 
 # regular expression to match document-level commands
 
-DOC_CMDS_RE = re.compile(
-                  r"@(?P<cmd>" + '|'.join(DOC_CMDS) + r")( (?P<value>.+))?")
+DOC_CMDS_RESTR = (
+    r"@(?P<cmd>" + '|'.join(DOC_CMDS) + r")(?: (?P<value>.+))?")
+DOC_CMDS_RE = re.compile(DOC_CMDS_RESTR)
+
+
+# regular expression to match any type of command line in a source file
+# - the type of line matched is given by the name of the outermost group
+# ('ignore', 'doc_cmd', 'node_cmd' or 'node_link_cmd'), available as
+# 'lastgroup' on the match; the alternatives are tried in that order,
+# so the precedence is the same as trying each type separately
+
+LINE_RE = re.compile(r"(?P<ignore>" + IGNORE_RESTR + r")"
+                     + r"|(?P<doc_cmd>" + DOC_CMDS_RESTR + r")"
+                     + r"|(?P<node_cmd>" + NODE_CMDS_RESTR + r")"
+                     + r"|(?P<node_link_cmd>" + NODE_LINK_CMDS_RESTR + r")")
+
+
+# filename extensions which are removed from a document filename to get
+# the name of the document
+
+DOC_FILENAME_EXTS = (".gde", ".ugde")
 
 
 # maximum size of a document in bytes
@@ -93,6 +113,12 @@ class GuideDoc(object):
         # initialise the list of nodes as empty
         self._nodes = []
 
+        # initialise the dictionary mapping node names to nodes as empty
+        # - this is used to look up nodes by name, without searching
+        # through the list; if a name is used by more than one node, the
+        # first is stored
+        self._nodes_by_name = {}
+
         # initialise an empty dictionary of indices - this will be
         # populated by parseindices(), if called
         self._indices = {}
@@ -129,7 +155,7 @@ class GuideDoc(object):
         # strip off the extension if it's '.gde' or '.ugde' (unformatted
         # guide - a term invented for this tool); the NextGuide viewer
         # add on '.gde' if the file is not found, with the plain name
-        if ext in [".gde", ".ugde"]:
+        if ext in DOC_FILENAME_EXTS:
             self._name = root
         else:
             self._name = root + ext
@@ -164,18 +190,28 @@ class GuideDoc(object):
         exist, None will be returned.
         """
 
-        for node in self._nodes:
-            if node.name == name:
-                return node
+        return self._nodes_by_name.get(name)
+
+
+    def _addnode(self, node):
+        """Add a node to the end of the list of nodes in the document
+        and record it in the dictionary of nodes by name (unless a node
+        with that name already exists).
+        """
 
-        return None
+        self._nodes.append(node)
+        self._nodes_by_name.setdefault(node.name, node)
 
 
     def getindices(self):
-        """Get the list of index names.
+        """Get the index names.  This is a view of the names (not a
+        list), so testing if a name is an index is a hashed lookup; it
+        cannot be indexed or changed.  parseindices() clears and refills
+        the same dictionary, so the view will reflect any changes if it
+        is called again.
         """
 
-        return list(self._indices)
+        return self._indices.keys()
 
 
     def getindex(self, name):
@@ -204,17 +240,25 @@ class GuideDoc(object):
         # and then return it, but not affect the original list
         warnings = self._warnings.copy()
 
-        # add warnings from the index, prefixed with 'index:'
-        for index in self._indices:
-            warnings.extend(
-                [ f"index: {warning}"
-                      for warning in self._indices[index].getwarnings() ])
+        # add warnings from the index, prefixed with 'index:' - we extend
+        # the list from generators, rather than building a temporary list
+        # for each index and node
+        for index in self._indices.values():
+            warnings.extend("index: " + warning
+                                for warning in index.getwarnings())
 
         # extend the copied list with the warnings from each node in the
         # document, prefixed by 'node: @name'
+        #
+        # the prefix is made once for each node, rather than formatting
+        # the node name into every warning, and only for nodes which have
+        # warnings (most won't)
         for node in self._nodes:
-            warnings.extend([ f"node: @{node.name} {warning}"
-                                  for warning in node.getwarnings() ])
+            node_warnings = node.getwarnings()
+            if node_warnings:
+                prefix = f"node: @{node.name} "
+                warnings.extend(prefix + warning
+                                    for warning in node_warnings)
 
         # return the composite list of warnings
         return warnings
@@ -228,19 +272,38 @@ class GuideDoc(object):
         # start with no current node
         current_node = None
 
-        # open the source file and work through the lines in it
+        # get the method to match command lines once, rather than looking
+        # it up for every line
+        line_match = LINE_RE.match
+
+        # read the whole source file in one go and split it into lines,
+        # rather than reading it a line at a time
         with open(filename) as f:
-            for l in f:
-                # strip any trailing whitespace as we never want that
-                l = l.rstrip()
+            lines = f.read().split('\n')
+
+        # if the file ends with a newline (or is empty), splitting it
+        # leaves an empty string after the last line, which we don't want
+        if lines[-1] == '':
+            lines.pop()
+
+        # work through the lines in the file
+        for l in lines:
+            # strip any trailing whitespace as we never want that
+            l = l.rstrip()
+
+            # match the line against all the types of command in one go -
+            # these all begin with '@', so we only need to try lines which
+            # do (most lines are just text in a node)
+            m = line_match(l) if l.startswith('@') else None
+            if m:
+                kind = m.lastgroup
 
                 # skip lines we want to ignore
-                if IGNORE_RE.match(l):
+                if kind == "ignore":
                     continue
 
-                # match document-level commands
-                m = DOC_CMDS_RE.match(l)
-                if m:
+                # document-level commands
+                if kind == "doc_cmd":
                     if current_node:
                         # we got a document-level command but are in a
                         # node - record a warning and ignore it
@@ -252,47 +315,44 @@ class GuideDoc(object):
                         # document
                         self._cmds[m.group("cmd")] = m.group("value")
 
-                    # skip to the next line in the file
-                    continue
-
-                # try to match the @node command at the start of a new node
-                m = NODE_CMDS_RE.match(l)
-                if m:
+                # the @node command at the start of a new node
+                elif kind == "node_cmd":
                     # if we've got a node we're building, we're done
-                    # with that, so append it to the list of nodes in
-                    # this document
+                    # with that, so add it to the nodes in this document
                     if current_node:
-                        self._nodes.append(current_node)
+                        self._addnode(current_node)
 
-                    # start a new node
-                    current_node = GuideNode(m.group("name"))
+                    # start a new node - the name is interned as it
+                    # will be used as a key and repeated in links from
+                    # other nodes
+                    current_node = GuideNode(sys.intern(m.group("node_name")))
 
-                    # skip to the next line in the file
-                    continue
+                # node-level commands linking to another node
+                else:
+                    # store the link (interning the name of the target
+                    # node, as above)
+                    current_node.setlink(m.group("link_type"),
+                                         sys.intern(m.group("link_name")))
 
-                # try to match node-level commands linking to another node
-                m = NODE_LINK_CMDS_RE.match(l)
-                if m:
-                    # store the link and skip to the next line in the file
-                    current_node.setlink(*m.group("link", "name"))
-                    continue
+                # skip to the next line in the file
+                continue
 
-                # anything else is a line of markup data in the node ...
+            # anything else is a line of markup data in the node ...
 
-                # we haven't started a node yet so we can't store this
-                # line - add a warning and skip the line
-                if not current_node:
-                    self.addwarning(f"node data: '{l} outside node - ignoring")
-                    continue
+            # we haven't started a node yet so we can't store this
+            # line - add a warning and skip the line
+            if not current_node:
+                self.addwarning(f"node data: '{l} outside node - ignoring")
+                continue
 
-                # add this line to the current node
-                current_node.appendline(l)
+            # add this line to the current node
+            current_node.appendline(l)
 
         # we're finished with the file - if we have a node we're
-        # assembling, that's complete, so append that to list of nodes
-        # in this document
+        # assembling, that's complete, so add that to the nodes in this
+        # document
         if current_node:
-            self._nodes.append(current_node)
+            self._addnode(current_node)
 
         # if the document had an index named in the '@index' document
         # command, add that to the list of index node names
@@ -314,14 +374,20 @@ class GuideDoc(object):
 
 
         # work through the nodes in order, filling in missing 'prev' and
-        # 'toc' links from the previous node
+        # 'toc' links from the previous node and 'next' links from the
+        # following node - we pair each node with the name of the next
+        # one (or None, for the last node), so this only needs a single
+        # pass
 
         prev_node = None
         toc_node = None
 
-        for node in self._nodes:
+        next_node_names = [ node.name for node in self._nodes[1:] ] + [None]
+
+        for node, next_node in zip(self._nodes, next_node_names):
             # set missing links for this node
             node.setdefaultlink("prev", prev_node)
+            node.setdefaultlink("next", next_node)
             node.setdefaultlink("toc", toc_node)
 
             # the default previous link for the next one is this node
@@ -333,33 +399,21 @@ class GuideDoc(object):
             toc_node = node.getlink("toc")
 
 
-        # work through the nodes in REVERSE order, filling in the 'next'
-        # link from the next node
-
-        next_node = None
-
-        for node in reversed(self._nodes):
-            node.setdefaultlink("next", next_node)
-            next_node = node.name
-
-
     def checklinks(self):
         """Check links in the document and generate warnings if any are
         broken (to nodes which do not exist).
         """
 
-        # get the list of node names as we're going to use it several
-        # times
-        node_names = self.getnodenames()
-
         # record a warning if the index node is defined but does not exist
         index_name = self._cmds.get(DOC_CMD_INDEX)
-        if index_name and (index_name not in node_names):
+        if index_name and (index_name not in self._nodes_by_name):
             self.addwarning(f"index node: @{index_name} does not exist")
 
-        # check node-level links for all nodes in the document
+        # check node-level links for all nodes in the document - we
+        # supply the dictionary of nodes by name, rather than a list of
+        # names, so checking a name exists doesn't search through them
         for node in self._nodes:
-            node.checklinks(node_names)
+            node.checklinks(self._nodes_by_name)
 
 
     def parseindices(self):
@@ -371,21 +425,21 @@ class GuideDoc(object):
 
         # --- make the list indices for this document ---
 
-        # initialise the list of index names to empty
-        index_names = []
-
         # if the document has an '@index' then add that as the first index
         index_name = self.getcmd(DOC_CMD_INDEX)
-        if index_name:
-            index_names.append(index_name)
+        index_names = [index_name] if index_name else []
 
-        # add any additional subindex names supplied to this function
-        index_names.extend(i for i in self._index_names if i != index_name)
+        # add any additional subindex names supplied to this function -
+        # the '@index' name is also in this set, so we remove duplicates
+        # with a dictionary, which keeps the first occurrence of each
+        index_names = dict.fromkeys(index_names + list(self._index_names))
 
         # --- process the indices ---
 
-        # initialise the index as empty
-        self._indices = {}
+        # initialise the index as empty - we clear the existing
+        # dictionary, rather than replacing it, so any views of the index
+        # names returned by getindices() stay valid
+        self._indices.clear()
 
         # go through the list of indices we built above
         for index_name in index_names:
@@ -398,15 +452,17 @@ class GuideDoc(object):
                 self._indices[index_name] = index_node.parseindex()
 
 
-    def format(self, *, node_docs={}, line_maxlen=LINE_MAXLEN, markup=True,
-               skip_index=False):
+    def iterformat(self, *, node_docs={}, line_maxlen=LINE_MAXLEN,
+                   markup=True, skip_index=False):
 
         """Format the document for output, with the document commands
         first, then the nodes, handling word wrap for the specified
         specified maximum line length, and qualifying links with
         document names, if required.
 
-        The output is returned as a list of lines as strings.
+        The output is returned as a generator yielding the lines as
+        strings, so callers writing them out don't need to build a
+        list of all the lines in the document first.
 
         Keyword arguments:
 
@@ -419,35 +475,51 @@ class GuideDoc(object):
         skip_index -- will omit index nodes in the output.
         """
 
-        # initialise the output as an empty list of lines
-        output = []
-
         # go through the document commands and record them in the
         # output, if they are present and not the empty string or None
         if markup:
             for cmd in DOC_CMDS:
-                if cmd in self._cmds:
-                    output.append(f"@{cmd} {self._cmds[cmd]}")
+                value = self._cmds.get(cmd)
+                if value:
+                    yield f"@{cmd} {value}"
+
+        # make the separators between nodes once, rather than for each
+        # node - in markup mode this is a line of dashes; in plain text
+        # mode the node name is included in a banner, padded out by a
+        # slice of the dashes
+        separator = '@' + ('-' * (line_maxlen - 1))
+        dashes = '-' * line_maxlen
+
+        # get the names of the index nodes, in case we're skipping them
+        index_names = self.getindices()
 
         # go through the nodes in the document in order
         for node in self._nodes:
             # if the name of this node is in the list of indices for
             # this document, and we're skipping those, ignore this node
-            if skip_index and (node.name in self.getindices()):
+            if skip_index and (node.name in index_names):
                 continue
 
             # add a line of dashes before this node as a separator
             if markup:
-                output.append('@' + ('-' * (line_maxlen - 1)))
+                yield separator
             else:
                 node_banner = "---[ " + node.name + " ]"
-                node_banner += '-' * (line_maxlen - len(node_banner) - 1)
+                node_banner += dashes[len(node_banner) + 1:]
 
-                output.extend(['', node_banner, ''])
+                yield ''
+                yield node_banner
+                yield ''
 
             # format this node and add the lines to the output
-            output.extend(node.format(doc=self, node_docs=node_docs,
-                                      line_maxlen=LINE_MAXLEN, markup=markup))
+            yield from node.format(doc=self, node_docs=node_docs,
+                                   line_maxlen=line_maxlen, markup=markup)
+
+
+    def format(self, **kwargs):
+        """Format the document for output, returning a list of lines as
+        strings.  This is a wrapper around iterformat(), which takes the
+        same keyword arguments.
+        """
 
-        # return the list of formatted lines
-        return output
+        return list(self.iterformat(**kwargs))
@@ -4,7 +4,10 @@
 
 
 
+import operator
 import re
+import string
+import sys
 
 from .token import LINK_RESTR, renderstring
 
@@ -43,26 +46,40 @@ INDEX_LINE_RE = re.compile(
     #
     # if this is omitted, the term will be continued from the previous
     # line (this is handled elsewhere)
-    + '('
+    #
+    # the words in static text can be separated by 1-2 spaces - there
+    # must be at least one, as allowing none would let adjacent runs of
+    # non-spaces split in any number of ways, which can backtrack
+    # exponentially if the match fails
+    + '(?:'
     + LINK_RESTR
-    + r"|(?P<static_text>\S+(\s{,2}\S+)*)"
+    + r"|(?P<static_text>\S+(?:\s{1,2}\S+)*)"
     + r")?"
 
     # optionally followed by 3 or more spaces and a list of references
     # as 'refs', which we parse separately, using the expression below
-    + r"(\s{3,}(?P<refs>.+))?")
+    + r"(?:\s{3,}(?P<refs>.+))?")
 
 
 # this regular expression matches references (the right column) one at a
-# time from the 'remainder' column in the line expression, above
+# time from the 'refs' group in the line expression, above - it is used
+# with finditer() to scan through all the references in a single pass
 
 INDEX_REFS_RE = re.compile(
     # the references column contains a link
     LINK_RESTR
 
-    # the remainder (if present) is separately by a comma and optional
-    # space
-    + r"(,\s*(?P<remainder>.+))?")
+    # the next reference (if present) is separated by a comma and
+    # optional space
+    + r"(?P<sep>,\s*)?")
+
+
+# the characters which an index term can start with to be sorted and
+# grouped as a number or letter (in either case), rather than a symbol -
+# the first character of a term is looked up in this, rather than
+# matching it with a regular expression
+
+INDEX_TERM_ALNUM_CHARS = frozenset(string.digits + string.ascii_letters)
 
 
 
@@ -104,7 +121,7 @@ def indextermkey_factory(term_prefixes):
 
         # if the term doesn't start with an alphanumeric character,
         # prefix it with a space and lower-case it
-        if not re.match("[0-9A-Z]", term, re.IGNORECASE):
+        if term[:1] not in INDEX_TERM_ALNUM_CHARS:
             return ' ' + term.lower()
 
         # return the term lower-cased
@@ -120,44 +137,7 @@ def linkcmd(text, target):
     target.
     """
 
-    return '@{"' + text + '" LINK ' + target + '}'
-
-
-
-def _itermore(iterable):
-    """Returns a generator yielding a tuple consisting of two values.
-    The first is the next iteration of the supplied iterable, and the
-    second is a boolean that indicates if there are more items available
-    in the iterable.  The second value will be True for all iterations
-    except the last.
-    """
-
-    # get an iterator for the iterable
-    i = iter(iterable)
-
-    try:
-        # try to get the first item
-        item = next(i)
-
-    except StopIteration:
-        # it failed, we're done (with no items)
-        return
-
-    # iterate through the items in the iterable, starting with the
-    # second (as we got the first, above)
-    for next_ in i:
-        # return the item retrieved last time and True, to signal there
-        # are more items to come
-        yield item, True
-
-        # store the item we retreived this time to return next time
-        item = next_
-
-    # we've exhausted the iterable - return the item we got last time
-    # and False, to indicate there are no more items available
-    yield item, False
-
-    # no further items, so the generator will stop here
+    return f'@{{"{text}" LINK {target}}}'
 
 
 
@@ -172,6 +152,11 @@ class GuideNodeDocs(object):
     """
 
 
+    # the attributes are fixed, so store them in slots, rather than a
+    # per-instance dictionary
+    __slots__ = ("_nodes", "_common_nodes")
+
+
     def __init__(self):
         """Initialise a GuideNodeDocs object.
         """
@@ -217,7 +202,6 @@ class GuideNodeDocs(object):
                 # we do - if it's not a common node, we add a warning
                 # that we have a duplicate node
                 if node_name not in self._common_nodes:
-                    print(self._common_nodes)
                     doc.addwarning(
                         f"node: @{node_name} same name already exists"
                         f" in document: {self._nodes[node_name]} -"
@@ -268,13 +252,17 @@ class GuideNodeDocs(object):
 
         # the link isn't in this document ...
 
+        # look up the document containing the target node (once, rather
+        # than checking it exists and then getting it)
+        target_doc_name = self._nodes.get(target_name)
+
         # if the target node was not found across the set, return None
         # to indicate it's a broken link
-        if target_name not in self._nodes:
+        if target_doc_name is None:
             return None
 
         # the target is in another document - return it qualified
-        return self._nodes[target_name] + '/' + target_name
+        return target_doc_name + '/' + target_name
 
 
 
@@ -301,6 +289,11 @@ class GuideIndex(object):
     """
 
 
+    # the attributes are fixed, so store them in slots, rather than a
+    # per-instance dictionary
+    __slots__ = ("_terms", "_warnings", "header", "footer", "termkey")
+
+
     def __init__(self, *, termkey=indextermkey_factory([])):
         """Initialise a GuideIndex object.
 
@@ -376,7 +369,18 @@ class GuideIndex(object):
 
 
     def _addterm(self, add_term_text, add_term_dict):
-        self_term = self._terms.setdefault(add_term_text, {})
+        self_term = self._terms.get(add_term_text)
+
+        # if this is a new term (which is the case for most terms, unless
+        # the same term appears in several documents being merged), there
+        # can be no conflicts, so just copy the target (if there is one)
+        # and references
+        if self_term is None:
+            self_term = self._terms[add_term_text] = {}
+            if add_term_dict.get("target"):
+                self_term["target"] = add_term_dict["target"]
+            self_term["refs"] = dict(add_term_dict["refs"])
+            return
 
         # if this entry specifies a primary target for the term, set it
         if add_term_dict.get("target"):
@@ -503,6 +507,13 @@ class GuideIndex(object):
         link information, warnings will be added.
         """
 
+        # an index entry must have a link, either as the term or in the
+        # references, so if the line contains no markup (including blank
+        # lines), it cannot be one - skip matching it and return that
+        # we're not in a term
+        if '@' not in line:
+            return None
+
         # try to parse index entry from this line - this should always
         # succeed but just return empty matching groups for some key
         # things but, if it doesn't, we return None for 'no match'
@@ -525,23 +536,33 @@ class GuideIndex(object):
         # render the text to remove formatting from the term dictionary
         term_text = renderstring(term_text_markup.strip())
 
-        # loop whilst there are more references to parse, collecting
-        # them into refs_dict
+        # go through the references, collecting them into refs_dict
         refs_dict = {}
-        while refs:
-            # try to match the first reference entry
-            m = INDEX_REFS_RE.match(refs)
+        if refs:
+            # the position the next reference must start at - if one is
+            # found after this, there is something else in between
+            pos = 0
+
+            for m in INDEX_REFS_RE.finditer(refs):
+                # not a reference where we expected - we're done with
+                # this line
+                if m.start() != pos:
+                    break
 
-            # no match - we're done with this line
-            if not m:
-                break
+                # get the parts of the reference entry
+                ref_text, ref_target, sep = (
+                    m.group("link_text", "link_target", "sep"))
 
-            # get the parts of the reference entry
-            ref_text, ref_target, refs = (
-                m.group("link_text", "link_target", "remainder"))
+                # store it in the dict, interning the target, as the
+                # same nodes are often referenced many times
+                refs_dict[ref_text.strip()] = sys.intern(ref_target)
 
-            # store it in the dict
-            refs_dict[ref_text.strip()] = ref_target
+                # no separator after the reference - we're done with
+                # this line
+                if not sep:
+                    break
+
+                pos = m.end()
 
         # if no link target in the term, nor any refs, this probably is
         # not an index entry but some plain text - ignore this line and
@@ -553,7 +574,7 @@ class GuideIndex(object):
         # to use with _addterm()
         term_dict = {}
         if term_link_target:
-            term_dict["target"] = term_link_target
+            term_dict["target"] = sys.intern(term_link_target)
         term_dict["refs"] = refs_dict
 
         # add the term to the dictionary, flagging up any warnings about
@@ -608,12 +629,22 @@ class GuideIndex(object):
         # initialise the returned lines list
         index_lines = []
 
+        # the indent for lines continuing the references for a term
+        # (which start in the references column)
+        refs_indent = ' ' * terms_width
+
         # work through the terms using the termkey function to sort them
-        # into order
-        for term_text in sorted(self, key=self.termkey):
+        # into order - the key for each term is worked out once, paired
+        # with the term, and used both for sorting and grouping (sorting
+        # on the key only, so terms with the same key keep their order)
+        for term_key, term_text in sorted(
+                ((self.termkey(term_text), term_text)
+                     for term_text in self._terms),
+                key=operator.itemgetter(0)):
+
             # the grouping for this term is the first character of the
             # sort key; if that was empty, we use a space
-            term_group = (self.termkey(term_text) or ' ')[0]
+            term_group = (term_key or ' ')[0]
 
             # if the group of this term is different from the previous
             # one, we need to insert a blank line
@@ -622,22 +653,28 @@ class GuideIndex(object):
 
                     index_lines.append('')
 
-            # get the dictionary about this term
-            term_dict = self[term_text]
+            # get the dictionary about this term and the primary target
+            # for it (if there is one) - the dictionary is accessed
+            # directly, rather than through __getitem__()
+            term_dict = self._terms[term_text]
+            term_target = term_dict.get("target")
 
-            # add the term to the rendered and markup versions of the
-            # output
+            # start the line with the term - the line is built up as a
+            # list of fragments of markup, which are only joined together
+            # when the line is written out, along with the length of the
+            # rendered version
             #
-            # the rendered version is used to calculate displayed widths
+            # the rendered length is used to calculate displayed widths
             # for word wrap; the markup version is used for the actual
             # output
-            line_render = ' ' + term_text + ' '
-            line_markup = (linkcmd(' ' + term_text + ' ', term_dict["target"])
-                               if term_dict.get("target")
-                               else (" @{b}" + term_text + "@{ub} "))
+            line_len = len(term_text) + 2
+            line_markup = [
+                linkcmd(' ' + term_text + ' ', term_target)
+                    if term_target
+                    else (" @{b}" + term_text + "@{ub} ")]
 
             # increase the number of links, if the term has a target set
-            if term_dict.get("target"):
+            if term_target:
                 num_links += 1
 
             # get the dictionary of references for this term
@@ -651,25 +688,32 @@ class GuideIndex(object):
                 # width of the terms column, write out the term on a
                 # line of it's own and start a new indented line for the
                 # references
-                if len(line_render) + terms_gap > terms_width:
-                    index_lines.append(line_markup)
-                    line_markup = line_render = ' ' * terms_width
+                if line_len + terms_gap > terms_width:
+                    index_lines.append(''.join(line_markup))
+                    line_markup = [refs_indent]
 
 
                 # the term and gap will fit in the terms column - add
                 # the number of spaces required to get into the
                 # references column
                 else:
-                    tab = ' ' * (terms_width - len(line_render))
-                    line_render += tab
-                    line_markup += tab
+                    line_markup.append(' ' * (terms_width - line_len))
+
+                line_len = terms_width
 
             # start with this being the first reference on a line
             line_first = True
 
+            # get the references in order and the position of the last
+            # one, so we know if there are more to come
+            refs = sorted(refs_dict)
+            refs_last = len(refs) - 1
+
             # work through the references, getting the reference name
             # and flag if there are more references to come
-            for ref, more in _itermore(sorted(refs_dict)):
+            for ref_num, ref in enumerate(refs):
+                more = ref_num != refs_last
+
                 # references are space-padded at start and end
                 ref_text = ' ' + ref + ' '
 
@@ -683,24 +727,25 @@ class GuideIndex(object):
 
                 # if adding this reference to the line would cause it to
                 # be overlength, finish that line and start a new one
-                if (len(line_render + ref_pre + ref_text + ref_post)
+                if (line_len + len(ref_pre) + len(ref_text) + len(ref_post)
                         > line_maxlen):
 
                     # write out this line
-                    index_lines.append(line_markup)
+                    index_lines.append(''.join(line_markup))
 
                     # start new, indented line
-                    line_markup = line_render = ' ' * terms_width
+                    line_markup = [refs_indent]
+                    line_len = terms_width
 
                     # we don't need the space before this term as this
                     # will be the first on the line
                     ref_pre = ''
 
-                # add this reference to the render and markup versions
-                # of the line
-                line_render += ref_pre + ref_text + ref_post
-                line_markup += (
+                # add this reference to the markup version of the line
+                # and its length to the rendered length
+                line_markup.append(
                     ref_pre + linkcmd(ref_text, refs_dict[ref]) + ref_post)
+                line_len += len(ref_pre) + len(ref_text) + len(ref_post)
 
                 # we're no longer the first term on the line (even if
                 # started a new one, we just added one that was the
@@ -710,7 +755,7 @@ class GuideIndex(object):
                 num_links += 1
 
             # add the last (uncompleted) line for this term the output
-            index_lines.append(line_markup)
+            index_lines.append(''.join(line_markup))
 
             # this term group as the previous, ready for the next one
             prev_term_group = term_group
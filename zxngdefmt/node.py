@@ -4,16 +4,14 @@
 
 
 
-import re
-
-from .index import GuideIndex
+from .index import GuideIndex, linkcmd
 
 from .token import (
     LINK_RE,
-    LITERALLINE_RE,
     TOKEN_RE,
+    isliteralline,
+    rendermatch,
     renderstring,
-    rendertoken,
 )
 
 
@@ -153,13 +151,17 @@ class GuideNode(object):
 
     def checklink(self, type_, node_names):
         """Check the target of a particular node link type exists in the
-        supplied list of node names (from a document or set), returning
-        False iff it is defined and does not.
+        supplied node names (from a document or set), returning False
+        iff it is defined and does not.  The node names can be any
+        container supporting 'in' (e.g. a list, or a dictionary keyed on
+        the name, which is faster).
 
         A warning will also be recorded, if it does not.
         """
 
-        link_name = self.getlink(type_)
+        # get the link directly, rather than through getlink(), as this
+        # is called for every link type of every node
+        link_name = self._links.get(type_)
 
         # if link is defined and no node exists with that name,
         # record a warning
@@ -174,7 +176,7 @@ class GuideNode(object):
 
     def checklinks(self, node_names):
         """Check all the node link types for this document exist in the
-        supplied list of node names (from a document or set).  False
+        supplied node names (from a document or set).  False
         will be returned iff any are defined and are missing, as well as
         warnings recorded.
         """
@@ -217,23 +219,31 @@ class GuideNode(object):
         # or the empty list if not
         output = ["@node " + self.name] if markup else []
 
-        # the current line being assembled - we store two versions:
+        # the current line being assembled - we store two versions, each
+        # as a list of fragments which are only joined together when the
+        # line is written out, to avoid repeatedly copying the line as it
+        # grows:
         #
         # line_markup contains the text containing literal text and
-        # commands and is used for the actual output
-        line_markup = ""
+        # commands and is used for the actual output (empty fragments
+        # are never added, so the line is empty iff the list is)
+        line_markup = []
         #
         # line_render contains the displayed text equivalent, obtained
-        # using rendertoken(), and is used to calculate displayed text
-        # lengths for wrapping words
-        line_render = ""
+        # using rendermatch(), and is used for plain text output
+        line_render = []
+        #
+        # line_len is the displayed length of line_render and is used
+        # for wrapping words
+        line_len = 0
 
         # the current 'word' being assembled - a word is a sequence of
         # tokens (markup, literal text, etc.) that cannot be broken
         # across lines - if it cannot fit on a line, a new line will be
         # begun
-        word_markup = ""
-        word_render = ""
+        word_markup = []
+        word_render = []
+        word_len = 0
 
         # any spaces before the current word - these will be discarded
         # if the word wraps onto the next line
@@ -244,8 +254,9 @@ class GuideNode(object):
         # not 'None' (which means explicitly not set)
         if markup:
             for link in _NODE_LINK_TYPES:
-                if (link in self._links) and self._links[link]:
-                    output.append(f"@{link} {self._links[link]}")
+                link_target = self._links.get(link)
+                if link_target:
+                    output.append(f"@{link} {link_target}")
 
         # number of links encountered so far in the node - we use this
         # to track if we have too many and need to raise a warning
@@ -260,13 +271,14 @@ class GuideNode(object):
             output lines and start a new one.
             """
 
-            nonlocal line_markup, line_render, pre_space
+            nonlocal line_len, pre_space
 
             if line_markup:
-                output.append(line_markup if markup else line_render)
+                output.append(''.join(line_markup if markup else line_render))
 
-                line_markup = ''
-                line_render = ''
+                line_markup.clear()
+                line_render.clear()
+                line_len = 0
 
                 # as we're starting a new line, we don't need the spaces
                 # that would separate the current word from the previous
@@ -284,53 +296,55 @@ class GuideNode(object):
             word and the next and is recorded in pre_space.
             """
 
-            nonlocal line_markup, line_render, word_markup, word_render
-            nonlocal pre_space
+            nonlocal line_len, word_len, pre_space
 
             # if no line or word is currently being assembled, we have
             # nothing to do
-            if (not line_render) and (not word_render):
+            if (not line_len) and (not word_len):
                 return
 
             # check if adding the pre_space and word to the line would
             # take it over the maximum length
-            if len(line_render + pre_space + word_render) > line_maxlen:
+            if line_len + len(pre_space) + word_len > line_maxlen:
                 # line would be over maximum - write it out
                 writeline()
 
                 # discard the space, as we're beginning a new line
 
-            else:
+            elif pre_space:
                 # the word will fit on this line - add the separating
                 # pre_space
-                line_markup += pre_space
-                line_render += pre_space
+                line_markup.append(pre_space)
+                line_render.append(pre_space)
+                line_len += len(pre_space)
 
             # add the word to the line (either a new, empty one, or
             # continuing the current one)
-            line_markup += word_markup
-            line_render += word_render
+            line_markup.extend(word_markup)
+            line_render.extend(word_render)
+            line_len += word_len
 
             # start a new word
-            word_markup = ''
-            word_render = ''
+            word_markup.clear()
+            word_render.clear()
+            word_len = 0
 
             # record the supplied space if required for the next word
             pre_space = space
 
 
-        def appendtoken(token):
-            """Add the supplied token to the current word.
-
-            This will add the markup, if 'markup' is set, or the plain
-            text rendering, if not.  If plain text is requested, links
-            will be 'bracketed' by rendertoken().
+        def appendtoken(token, render):
+            """Add the supplied token to the current word, along with
+            its rendered, plain text version (obtained with
+            rendermatch(), where links will be 'bracketed' if plain text
+            is requested).
             """
 
-            nonlocal word_markup, word_render
+            nonlocal word_len
 
-            word_markup += token
-            word_render += rendertoken(token, link_bracket=not markup)
+            word_markup.append(token)
+            word_render.append(render)
+            word_len += len(render)
 
 
         def fixlink_repl(m):
@@ -355,7 +369,7 @@ class GuideNode(object):
 
             # return the fixed link or, if the target was not found,
             # return the target anyway
-            return '@{"' + text + '" LINK ' + (fixed_target or target) + '}'
+            return linkcmd(text, fixed_target or target)
 
 
         # --- method ---
@@ -365,7 +379,7 @@ class GuideNode(object):
         for line in self._lines:
             # count the number of links in this line and add it to the
             # total for this node
-            num_links += len(re.findall(LINK_RE, line))
+            num_links += len(LINK_RE.findall(line))
 
             # fix all the links in this line such that, if a link is to
             # a node in another document in the set, qualify it by
@@ -373,11 +387,11 @@ class GuideNode(object):
             #
             # this will also record warnings on for link targets which
             # don't exist
-            line = re.sub(LINK_RE, fixlink_repl, line)
+            line = LINK_RE.sub(fixlink_repl, line)
 
             # if the line is blank, or is one that is to be included
             # literally, just add that to the document
-            if (line == '') or LITERALLINE_RE.match(line):
+            if (line == '') or isliteralline(line):
                 # finish the current line and append it (if it has
                 # something in it)
                 writeline()
@@ -391,26 +405,86 @@ class GuideNode(object):
 
                 continue
 
-            # go through the line matching tokens (markup, literal or spaces)
-            remainder = line
-            while remainder:
-                m = re.match(TOKEN_RE, remainder)
-
-                # if we couldn't match a token, something has gone
-                # irretrievably wrong (probably with the regexp)
-                if not m:
-                    raise ValueError(
-                              "failed to match next token in: " + remainder)
-
-                token, remainder = m.group("token", "remainder")
-
-                if m.group("space"):
-                    # token is a space - complete the current word
-                    completeword(space=token)
-                else:
-                    # token is not a space - try to add it to the
-                    # current line (otherwise begin a new one)
-                    appendtoken(token)
+            # if the line contains no markup, it's just words separated
+            # by spaces - each word renders as itself, so we can split
+            # it up without matching tokens
+            if '@' not in line:
+                # the run of spaces since the last word
+                space = ''
+
+                for i, word in enumerate(line.split(' ')):
+                    # there is a space between each piece of the split
+                    # line (pieces are empty between adjacent spaces)
+                    if i:
+                        space += ' '
+
+                    if word:
+                        # if there were spaces before this word, that
+                        # completes the previous one
+                        if space:
+                            completeword(space=space)
+                            space = ''
+
+                        appendtoken(word, word)
+
+                # complete the word if the line ended with spaces
+                if space:
+                    completeword(space=space)
+
+            # go through the line splitting it into tokens - the first
+            # character of each token tells us what type it is, so we
+            # only need to match markup (beginning with '@') with the
+            # regular expression; runs of spaces and plain words are
+            # found with simple string operations
+            else:
+                i = 0
+                line_end = len(line)
+
+                while i < line_end:
+                    c = line[i]
+
+                    if c == ' ':
+                        # token is a run of spaces - find the end of it
+                        # and complete the current word
+                        j = i + 1
+                        while (j < line_end) and (line[j] == ' '):
+                            j += 1
+
+                        completeword(space=line[i:j])
+
+                    elif c == '@':
+                        # token is markup - match it to find out what
+                        # type it is and try to add it to the current
+                        # line (otherwise begin a new one)
+                        m = TOKEN_RE.match(line, i)
+
+                        # if we couldn't match a token, something has
+                        # gone irretrievably wrong (probably with the
+                        # regexp)
+                        if not m:
+                            raise ValueError(
+                                "failed to match next token in: " + line[i:])
+
+                        appendtoken(
+                            m[0], rendermatch(m, link_bracket=not markup))
+
+                        j = m.end()
+
+                    else:
+                        # token is a plain word - this runs up to the
+                        # next space or markup and renders as itself
+                        j = line.find(' ', i)
+                        if j == -1:
+                            j = line_end
+
+                        k = line.find('@', i, j)
+                        if k != -1:
+                            j = k
+
+                        word = line[i:j]
+                        appendtoken(word, word)
+
+                    i = j
 
             # the end of line in the source text completes a word and
             # adds a separating space before the next one (if there is
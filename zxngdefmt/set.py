@@ -117,19 +117,23 @@ class GuideSet(object):
 
         # first, extend the list of warnings with those from each
         # document
+        #
+        # the prefix is made once for each document and index, rather than
+        # formatting the name into every warning
         for doc in self._docs:
-            warnings.extend([ f"document: {doc.getname()} {warning}"
-                                  for warning in doc.getwarnings() ])
+            prefix = f"document: {doc.getname()} "
+            warnings.extend(prefix + warning
+                                for warning in doc.getwarnings())
 
         # add in our warnings - we do this after the document ones as
         # these a generated after each document is processed
         warnings.extend(self._warnings)
 
         # add in the warnings from the set indices
-        for index in sorted(self._indices):
-            warnings.extend(
-                [ f"set index: {index} {warning}"
-                    for warning in self._indices[index].getwarnings() ])
+        for index_name, index in sorted(self._indices.items()):
+            prefix = f"set index: {index_name} "
+            warnings.extend(prefix + warning
+                                for warning in index.getwarnings())
 
         # return the composite list of warnings
         return warnings
@@ -167,7 +171,7 @@ class GuideSet(object):
         for doc in self._docs:
             with (open(os.path.join(dir, doc.getname() + ".gde"), 'w')
                       as f):
-                print('\n'.join(doc.format(node_docs=self._node_docs)),
+                print('\n'.join(doc.iterformat(node_docs=self._node_docs)),
                       file=f)
 
                 # add a warning if this file is over the maximum size
@@ -190,17 +194,22 @@ class GuideSet(object):
         """
 
         for doc in self._docs:
+            # assemble the lines for this document and print them in one
+            # go, rather than printing each line separately
+            lines = []
+
             # we only print the filename of this document is rendering
             # a non-readable 'debugging' format
             if not readable:
-                print()
-                print(f"=== {doc.getname()} ===")
-                print()
-
-            # print the formatted lines
-            for line in doc.format(node_docs=self._node_docs,
-                                   markup=not readable, skip_index=readable):
-                print(line)
+                lines.extend(['', f"=== {doc.getname()} ===", ''])
+
+            # add the formatted lines
+            lines.extend(doc.iterformat(node_docs=self._node_docs,
+                                        markup=not readable,
+                                        skip_index=readable))
+
+            if lines:
+                print('\n'.join(lines))
 
 
     def getnodedocs(self):
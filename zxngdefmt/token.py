@@ -7,6 +7,7 @@
 
 
 
+import functools
 import re
 
 
@@ -40,67 +41,112 @@ WORD_RESTR = r"[^@ ]+"
 SPACE_RESTR = r"(?P<space> +)"
 SPACE_RE = re.compile(SPACE_RESTR)
 
-# match any type of markup token or word or block of spaces
-TOKEN_RE = re.compile(r"(?P<token>"
-                      + LINK_RESTR
-                      + r'|' + ATTR_RESTR
-                      + r'|' + LITERALTOKEN_RESTR
-                      + r'|' + WORD_RESTR
-                      + r'|' + SPACE_RESTR
-                      + r')'
-                      + r"(?P<remainder>.*)")
+# match any type of markup token or word or block of spaces - the type
+# of token matched is given by the name of the outermost group ('link',
+# 'attr', 'literal', 'word' or 'space'), available as 'lastgroup' on
+# the match
+TOKEN_RE = re.compile(r"(?P<link>" + LINK_RESTR + r")"
+                      + r"|(?P<attr>" + ATTR_RESTR + r")"
+                      + r"|(?P<literal>" + LITERALTOKEN_RESTR + r")"
+                      + r"|(?P<word>" + WORD_RESTR + r")"
+                      + r'|' + SPACE_RESTR)
 
 # start of a new node
-NODE_CMDS_RE = re.compile(r"@node (?P<name>\S+)")
+NODE_CMDS_RESTR = r"@node (?P<node_name>\S+)"
+NODE_CMDS_RE = re.compile(NODE_CMDS_RESTR)
 
 # nodal commands for a linked node token
-NODE_LINK_CMDS_RE = re.compile(
-                        r"@(?P<link>(node|prev|next|toc)) (?P<name>\S+)")
+NODE_LINK_CMDS_RESTR = (
+    r"@(?P<link_type>node|prev|next|toc) (?P<link_name>\S+)")
+NODE_LINK_CMDS_RE = re.compile(NODE_LINK_CMDS_RESTR)
 
 # lines to ignore:
 #
 # - a token with hyphens (a separator between nodes), or
 #
 # - a remark command
-IGNORE_RE = re.compile(r"@(-+|rem\s)")
+IGNORE_RESTR = r"@(?:-+|rem\s)"
+IGNORE_RE = re.compile(IGNORE_RESTR)
 
+# a run of 3 or more consecutive spaces (or other whitespace) in a line
+WHITESPACERUN_RE = re.compile(r"\s{3}")
 
-# LITERALLINE_RE = string
+# a header command
+HEADER_RE = re.compile(r"@{h\d}")
+
+
+
+# LITERAL_CHARS = dict
 #
-# Regular expression to match lines which must be included in the output
-# guide literally (i.e. without reformatting).
+# Characters following '@' in a literal token which are displayed as a
+# different character.  Any characters not in here are displayed as
+# themselves.
 
-LITERALLINE_RE = re.compile(
-    r'('
+LITERAL_CHARS = {
+    # '@(' is the copyright sign
+    "(": "\N{COPYRIGHT SIGN}",
+}
 
-    # lines with leading spaces
-    + r"\s+"
 
-    # lines with 3 or more consecutive spaces
-    + r"|.+\s{3,}"
 
-    # lines with headers
-    + r"|.*@{h\d}"
+# --- functions ---
 
-    # lines with centred or right-justified text
-    + r"|@{[cr]}"
 
-    # lines consisting solely of a single link
-    + r'|' + LINK_RESTR + r'$'
 
-    + r')')
+def isliteralline(l):
+    """Return if a line must be included in the output guide literally
+    (i.e. without reformatting).  These are lines:
 
+    - with leading spaces,
 
+    - with 3 or more consecutive spaces,
 
-# --- functions ---
+    - with headers,
+
+    - with centred or right-justified text, or
+
+    - consisting solely of a single link.
+
+    This uses simple string tests, where possible, with regular
+    expressions only used for the checks which need them, rather than
+    trying a single, large alternation against every line.
+    """
+
+    # blank lines are not literal (they're handled separately)
+    if not l:
+        return False
+
+    # lines with leading spaces
+    if l[0].isspace():
+        return True
+
+    # lines with centred or right-justified text
+    if l.startswith(("@{c}", "@{r}")):
+        return True
+
+    # lines with 3 or more consecutive spaces - a plain substring search
+    # finds these in almost all cases; the regular expression is only
+    # needed if the line contains other whitespace characters (such as
+    # tabs), which are all non-printable, so can be checked for quickly
+    if ("   " in l) or ((not l.isprintable()) and WHITESPACERUN_RE.search(l)):
+        return True
+
+    # lines with headers
+    if HEADER_RE.search(l):
+        return True
+
+    # lines consisting solely of a single link
+    return bool(LINK_RE.fullmatch(l))
 
 
 
-def rendertoken(t, *, link_bracket=False):
-    """Return a single rendered NextGuide token (which could be a
-    literal piece of text, a command, or block of spaces) into the plain
-    text equivalent (without formatting) that would be displayed on
-    screen.
+def rendermatch(m, *, link_bracket=False):
+    """Return the rendered version of a single token, as matched by
+    TOKEN_RE (e.g. yielded by itertokens()), which could be a literal
+    piece of text, a command, or block of spaces, as the plain text
+    equivalent (without formatting) that would be displayed on screen.
+    The type of token is known from the group that matched, so the
+    token does not need to be matched again.
 
     This is used to work out the length of rendered markup and calculate
     displayed line lengths; it is not used when writing out guide files,
@@ -112,62 +158,76 @@ def rendertoken(t, *, link_bracket=False):
     would have been links (and makes the multiple spaces look less odd).
     """
 
+    kind = m.lastgroup
+
     # if the token is a link, use the displayed text field
-    m = LINK_RE.match(t)
-    if m:
+    if kind == "link":
         t = m["link_text"]
         if link_bracket and t.startswith(' ') and t.endswith(' '):
             return '<' + t[1:-1] + '>'
-        return m["link_text"]
+        return t
 
     # if the token is a literal character, convert that to the displayed
     # character
-    m = LITERALTOKEN_RE.match(t)
-    if m:
-        c = m["char"]
-
-        # '@(' is the copyright sign
-        if c == "(":
-            return "\N{COPYRIGHT SIGN}"
-
+    if kind == "literal":
+        # some characters are mapped to a different displayed character;
         # everything else we treat as whatever is after the '@'
-        else:
-            return c
+        c = m["char"]
+        return LITERAL_CHARS.get(c, c)
 
     # attribute formatting codes don't render to anything displayed
-    m = ATTR_RE.match(t)
-    if m:
+    if kind == "attr":
         return ''
 
     # we have a literal word or block of spaces - just use that directly
-    return t
+    return m[0]
 
 
 
-def renderstring(s, *, link_bracket=False):
-    """Return a string containing tokens (literals, commands, spaces,
-    etc.) rendered into their plain text equivalent.  It is a wrapper
-    around rendertoken() which iteratively renders all the tokens in a
-    string.
+def itertokens(s):
+    """Return a generator yielding the match for each token (markup,
+    literal text or block of spaces) in a string, in order.  The whole
+    string is scanned in a single pass, rather than matching a token
+    and then the remainder of the string repeatedly.
 
-    The 'link_bracket' argument is passed on to rendertoken().
+    If part of the string cannot be matched as a token, ValueError is
+    raised.
     """
 
-    # start with the rendered string empty
-    r = ''
+    # the position the next token must start at - if a token is found
+    # after this, the characters in between could not be matched
+    pos = 0
 
-    # go through the string matching tokens (markup, literal or spaces)
-    remainder = s
-    while remainder:
-        m = TOKEN_RE.match(remainder)
+    for m in TOKEN_RE.finditer(s):
+        if m.start() != pos:
+            break
 
-        # if we couldn't match a token, something has gone irretrievably
-        # wrong (probably with the regexp)
-        if not m:
-            raise ValueError("failed to match next token in: " + remainder)
+        yield m
 
-        token, remainder = m.group("token", "remainder")
+        pos = m.end()
 
-        r += rendertoken(token, link_bracket=link_bracket)
+    # if we couldn't match a token, something has gone irretrievably
+    # wrong (probably with the regexp)
+    if pos != len(s):
+        raise ValueError("failed to match next token in: " + s[pos:])
 
-    return r
+
+
+@functools.lru_cache(maxsize=512)
+def renderstring(s, *, link_bracket=False):
+    """Return a string containing tokens (literals, commands, spaces,
+    etc.) rendered into their plain text equivalent.  It is a wrapper
+    around rendermatch() which iteratively renders all the tokens in a
+    string.
+
+    The 'link_bracket' argument is passed on to rendermatch().
+
+    The results are cached as the same strings (e.g. index terms, which
+    are repeated in the index node of each document in a set) are often
+    rendered many times.
+    """
+
+    # go through the string matching tokens (markup, literal or spaces)
+    # and join together their rendered versions
+    return ''.join(rendermatch(m, link_bracket=link_bracket)
+                       for m in itertokens(s))